@@ -7,12 +7,23 @@ An autonomous coding agent that generates custom parsers for bank statement PDFs
 import os
 import sys
 import json
+import time
+import hashlib
+import functools
+import pickle
+import tempfile
+import subprocess
+import threading
+import io
+import ast
+import tokenize
 import argparse
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, AsyncIterator, Tuple, Callable
+import numpy as np
 import pandas as pd
+import jinja2
 import re
-from datetime import datetime
 
 # LLM imports
 try:
@@ -23,15 +34,30 @@ except ImportError:
     GOOGLE_AVAILABLE = False
 
 try:
-    from groq import Groq
+    from groq import Groq, AsyncGroq
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
 
+# Response cache
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+# Fast CSV reader
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 # Agent state management
 from dataclasses import dataclass, field
 from typing import TypedDict, Annotated
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 # Rich console for better output
 from rich.console import Console
@@ -41,6 +67,275 @@ from rich.prompt import Confirm
 
 console = Console()
 
+CACHE_DIR = Path("~/.cache/ai-agent-challenge").expanduser()
+
+# Used for every expected-CSV read, including the generated tests, so both see identical dtypes
+CSV_ENGINE = "pyarrow" if PYARROW_AVAILABLE else "c"
+
+# Bump whenever the prompts change so cached parsers from older prompts are not reused
+PROMPT_VERSION = "2"
+
+# Sampling temperatures used for the concurrent candidates of each attempt
+CANDIDATE_TEMPERATURES = (0.0, 0.2, 0.5)
+
+# Sampling temperatures for the speculative first attempt
+SPECULATIVE_TEMPERATURES = (0.0, 0.3, 0.6)
+
+# Skeleton the LLM fills in; keeps regexes compiled once and numeric columns on a JIT path
+PARSER_SKELETON = '''
+import re
+import numpy as np
+import pandas as pd
+import pdfplumber
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+COLUMNS = [...]  # TODO: expected column names, in order
+
+# TODO: pre-compile every regex the parser needs at module scope
+TRANSACTION_RE = re.compile(r"...")
+
+@njit(cache=True)
+def _parse_amounts(buf):
+    """Convert a (rows, width) uint8 matrix of ASCII amounts to float64 (NaN for blanks)."""
+    out = np.empty(buf.shape[0], dtype=np.float64)
+    for i in range(buf.shape[0]):
+        mantissa = 0
+        decimals = -1
+        negative = False
+        seen = False
+        for j in range(buf.shape[1]):
+            c = buf[i, j]
+            if c == 0:
+                break
+            if c == 45:  # "-"
+                negative = True
+            elif c == 46:  # "."
+                decimals = 0
+            elif 48 <= c <= 57:
+                seen = True
+                mantissa = mantissa * 10 + (c - 48)
+                if decimals >= 0:
+                    decimals += 1
+        if not seen:
+            out[i] = np.nan
+        else:
+            value = mantissa / 10.0 ** max(decimals, 0)
+            out[i] = -value if negative else value
+    return out
+
+def parse_amounts(values) -> np.ndarray:
+    """Vectorized "1,935.30" / "" -> float64 conversion for debit, credit and balance columns."""
+    # Drop non-ASCII characters such as currency symbols ("₹1,000") before packing
+    buf = np.array([v.encode("ascii", "ignore") if isinstance(v, str) else b"" for v in values], dtype="S32")
+    if buf.size == 0:
+        return np.empty(0, dtype=np.float64)
+    return _parse_amounts(buf.view(np.uint8).reshape(buf.size, 32))
+
+def parse(pdf_path: str) -> pd.DataFrame:
+    with pdfplumber.open(pdf_path) as pdf:
+        lines = [line for page in pdf.pages for line in (page.extract_text() or "").splitlines()]
+    
+    records = []
+    for line in lines:
+        match = TRANSACTION_RE.match(line)
+        if match:
+            records.append(match.groups())  # TODO: one tuple per transaction, in COLUMNS order
+    
+    df = pd.DataFrame.from_records(records, columns=COLUMNS)
+    for column in [...]:  # TODO: numeric columns
+        df[column] = parse_amounts(df[column].tolist())
+    return df
+'''
+
+# Fenced code block in an LLM response; the opening fence starts a line and may
+# carry any info string (python, Python, python3, py, ...)
+_CODE_FENCE_RE = re.compile(r"^```[\w+-]*[ \t]*\n(.*?)(?:\n```|\Z)", re.DOTALL | re.MULTILINE)
+
+# Prompt templates are compiled once at import
+_GEN_TEMPLATE = jinja2.Template("""
+You are an expert Python developer specializing in PDF parsing. Create a custom parser for {{ bank_name }} bank statements.
+
+PDF Content Structure:
+{{ pdf_content }}
+
+Expected CSV Schema:
+{{ schema_json }}
+
+Requirements:
+1. Create a function `parse(pdf_path: str) -> pd.DataFrame`
+2. The function must return a DataFrame matching the CSV schema exactly
+3. Handle date parsing, number formatting, and text extraction
+4. Include proper error handling and validation
+5. Use pandas, pdfplumber, and other standard libraries
+6. Add comprehensive docstrings and type hints
+7. Pre-compile all regexes at module scope with `re.compile`
+8. Convert debit/credit/balance strings to float64 with the `@numba.njit(cache=True)` helper from the skeleton, not per-row `float()` calls
+9. Build the DataFrame once with `pd.DataFrame.from_records`, never with row-wise `append`/`concat`
+
+Start from this skeleton and fill in the TODOs:
+{{ skeleton }}
+
+Generate ONLY the Python code, no explanations:
+""", keep_trailing_newline=True)
+
+_FIX_TEMPLATE = jinja2.Template("""
+Previous parser failed with these issues:
+{{ test_results_json }}
+
+PDF Content:
+{{ pdf_content }}
+
+Expected Schema:
+{{ schema_json }}
+
+Previous Code:
+{{ parser_code }}
+
+Please fix the parser code to address the issues above. Focus on:
+1. Correct column names and data types
+2. Proper date parsing
+3. Number formatting
+4. Text extraction logic
+5. Error handling
+
+Generate ONLY the corrected Python code:
+""", keep_trailing_newline=True)
+
+def _schema_json(csv_schema: Dict[str, Any]) -> str:
+    """Serialize a CSV schema for the prompts (dtypes are rendered with str)."""
+    return json.dumps(csv_schema, indent=2, default=str)
+
+# Transaction rows start with a date such as 01-08-2024 or 2024/08/01
+_ROW_RE = re.compile(r"^\s*\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}\b")
+
+# Parser emitted for statements laid out as a table under one header row. Cells
+# are not fixed-width (long descriptions run into the next column and cells may
+# be centered), so words are placed by their horizontal position instead
+_TABLE_LAYOUT_PARSER = """\"\"\"
+Template-generated parser for bank statements laid out as a table of columns.
+\"\"\"
+
+import re
+import pandas as pd
+
+COLUMNS = {columns!r}
+NUMERIC_COLUMNS = {numeric_columns!r}
+TEXT_COLUMNS = [column for column in COLUMNS[1:] if column not in NUMERIC_COLUMNS]
+DATE_RE = re.compile(r"{row_pattern}")
+AMOUNT_RE = re.compile(r"^-?[\\d,]*\\.?\\d+$")
+
+def _read_lines(pdf_path: str) -> list:
+    \"\"\"Return the statement's words as `(x0, x1, text)` tuples grouped into lines.\"\"\"
+    if pdf_path.endswith(".txt"):
+        with open(pdf_path, "r", encoding="utf-8") as f:
+            return [
+                [(m.start(), m.end(), m.group()) for m in re.finditer(r"\\S+", line)]
+                for line in f.read().splitlines()
+            ]
+    import pdfplumber
+    lines = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            top = None
+            for word in sorted(page.extract_words(), key=lambda w: w["top"]):
+                if top is None or word["top"] - top > 3:
+                    top = word["top"]
+                    lines.append([])
+                lines[-1].append((word["x0"], word["x1"], word["text"]))
+    return [sorted(line) for line in lines]
+
+def _label_centers(line: list) -> dict:
+    \"\"\"Horizontal center of each column label if `line` is the table header, else empty.\"\"\"
+    texts = [text for _, _, text in line]
+    centers = {{}}
+    for column in COLUMNS:
+        label = column.split()
+        for i in range(len(texts) - len(label) + 1):
+            if texts[i:i + len(label)] == label:
+                centers[column] = (line[i][0] + line[i + len(label) - 1][1]) / 2
+                break
+        else:
+            return {{}}
+    return centers
+
+def _nearest(centers: dict, columns: list, word: tuple) -> str:
+    \"\"\"The column among `columns` whose label is horizontally closest to `word`.\"\"\"
+    center = (word[0] + word[1]) / 2
+    return min(columns, key=lambda column: abs(centers[column] - center))
+
+def parse(pdf_path: str) -> pd.DataFrame:
+    \"\"\"Parse a statement into a DataFrame with columns {columns}.\"\"\"
+    records = []
+    centers = {{}}
+    for line in _read_lines(pdf_path):
+        # A header line (repeated on each page) sets the label positions for the rows below it
+        centers = _label_centers(line) or centers
+        if not centers or not line or not DATE_RE.match(line[0][2]):
+            continue
+        
+        record = {{COLUMNS[0]: line[0][2]}}
+        words = line[1:]
+        # Trailing amounts belong to the numeric column whose label they sit under;
+        # a number nearer a text column, or under a filled column, is part of the text
+        while words and AMOUNT_RE.match(words[-1][2]):
+            column = _nearest(centers, COLUMNS[1:], words[-1])
+            if column not in NUMERIC_COLUMNS or column in record:
+                break
+            record[column] = float(words.pop()[2].replace(",", ""))
+        for word in words:
+            if TEXT_COLUMNS:
+                column = _nearest(centers, TEXT_COLUMNS, word)
+                record[column] = record[column] + " " + word[2] if column in record else word[2]
+        records.append(record)
+    return pd.DataFrame.from_records(records, columns=COLUMNS)
+"""
+
+def _read_layout_text(pdf_path: str) -> str:
+    """Statement text with its column layout, used to recognize a table before emitting a parser."""
+    if pdf_path.endswith(".txt"):
+        with open(pdf_path, "r", encoding="utf-8") as f:
+            return f.read()
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return "\n".join(page.extract_text(layout=True) or "" for page in pdf.pages)
+
+def _table_layout_parser(csv_schema: Dict[str, Any], layout_text: str) -> Optional[str]:
+    """Synthesize a parser that places each word of a row under the nearest header label.
+    
+    The emitted parser reads word positions (`extract_words` x-coordinates,
+    or character offsets for text statements). A row starts with a date,
+    its trailing amounts go to the numeric column whose label is closest,
+    and the remaining words form the text columns. Returns None when
+    `layout_text` has no header line naming every expected column followed
+    by rows that start with a date.
+    """
+    columns = csv_schema.get("columns", [])
+    lines = layout_text.splitlines()
+    header_index = next((i for i, line in enumerate(lines) if all(col in line for col in columns)), None)
+    if header_index is None:
+        return None
+    if not any(_ROW_RE.match(line) for line in lines[header_index + 1:]):
+        return None
+    
+    dtypes = csv_schema.get("dtypes", {})
+    numeric_columns = [col for col in columns if getattr(dtypes.get(col), "kind", "O") in "fiu"]
+    return _TABLE_LAYOUT_PARSER.format(
+        columns=columns,
+        numeric_columns=numeric_columns,
+        row_pattern=_ROW_RE.pattern
+    )
+
+# Known statement layouts, keyed by expected column set, that skip the LLM entirely
+BANK_TEMPLATES: Dict[frozenset, Callable[[Dict[str, Any], str], Optional[str]]] = {
+    frozenset({"Date", "Description", "Debit", "Credit", "Balance"}): _table_layout_parser,
+    frozenset({"Date", "Description", "Debit Amt", "Credit Amt", "Balance"}): _table_layout_parser,
+}
+
 @dataclass
 class AgentState:
     """State management for the agent loop."""
@@ -54,12 +349,304 @@ class AgentState:
     errors: List[str] = field(default_factory=list)
     success: bool = False
 
+def input_digest(state: AgentState) -> str:
+    """Hash of the bank name, input files and prompt version; scopes all caches."""
+    digest = hashlib.sha1(state.target_bank.encode("utf-8"))
+    for path in (state.pdf_path, state.csv_path):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    digest.update(PROMPT_VERSION.encode("utf-8"))
+    return digest.hexdigest()
+
+def parser_cache_path(digest: str) -> Path:
+    """Location of the cached validated parser for an `input_digest`."""
+    return CACHE_DIR / "parsers" / f"{digest}.py"
+
+@functools.lru_cache(maxsize=32)
+def _read_pdf_text(pdf_path: str, mtime: float) -> str:
+    """Read a statement's text once per (path, mtime)."""
+    with open(pdf_path, 'rb') as f:
+        return f.read().decode('utf-8', 'replace')
+
+def load_csv(csv_path: str) -> pd.DataFrame:
+    """Read a CSV with the multithreaded Arrow reader when pyarrow is installed."""
+    return pd.read_csv(csv_path, engine=CSV_ENGINE)
+
+def _df_equal_fast(a: pd.DataFrame, b: pd.DataFrame, max_examples: int = 3) -> Tuple[bool, Dict[str, Any]]:
+    """Compare two DataFrames column by column with vectorized NumPy masks.
+    
+    Mirrors `DataFrame.equals` (dtypes must match, missing values compare
+    equal) but also returns a JSON-serializable summary of where the frames
+    differ, which is fed back to the LLM when fixing a parser.
+    """
+    if a.shape != b.shape:
+        return False, {"shape": f"got {a.shape}, expected {b.shape}"}
+    if list(a.columns) != list(b.columns):
+        return False, {"columns": f"got {list(a.columns)}, expected {list(b.columns)}"}
+    if not a.index.equals(b.index):
+        return False, {"index": "row index differs from the expected RangeIndex"}
+    
+    diffs = {}
+    for column in a.columns:
+        left, right = a[column], b[column]
+        if left.dtype != right.dtype:
+            diffs[column] = {"dtype": f"got {left.dtype}, expected {right.dtype}"}
+            continue
+        
+        x, y = left.to_numpy(), right.to_numpy()
+        diff_mask = (x != y) & ~(pd.isna(x) & pd.isna(y))
+        if diff_mask.any():
+            rows = np.flatnonzero(diff_mask)
+            diffs[column] = {
+                "mismatched_rows": int(rows.size),
+                "examples": [
+                    {"row": int(i), "got": str(x[i]), "expected": str(y[i])}
+                    for i in rows[:max_examples]
+                ]
+            }
+    
+    return not diffs, diffs
+
+def _strip_code_fences(code: str) -> str:
+    """Return the code inside the first Markdown fence, or the whole text if unfenced."""
+    match = _CODE_FENCE_RE.search(code)
+    return match.group(1) if match else code.strip()
+
+def _clean_and_validate(code: str) -> str:
+    """Strip Markdown fences and check the code parses.
+    
+    Raises ValueError when no code is left and SyntaxError when it does not parse.
+    """
+    code = _strip_code_fences(code)
+    if not code.strip():
+        raise ValueError("Response contained no parser code")
+    ast.parse(code)
+    return code
+
+def _stream_is_broken(code: str) -> bool:
+    """Whether partially streamed code already has a syntax error more tokens cannot fix.
+    
+    Only the complete lines of the fenced code block are tokenized, located the
+    same way as `_strip_code_fences`. Until an opening fence arrives the text
+    may still be prose, so it is never reported as broken. Unclosed brackets
+    or strings just mean the code is incomplete.
+    """
+    match = _CODE_FENCE_RE.search(code[:code.rfind("\n") + 1])
+    if match is None:
+        return False
+    
+    try:
+        for _ in tokenize.generate_tokens(io.StringIO(match.group(1)).readline):
+            pass
+    except tokenize.TokenError:
+        return False
+    except SyntaxError:
+        return True
+    return False
+
+# Runs a candidate parser in a fresh interpreter and pickles its output (or the
+# failing line and traceback) to stdout. The payload is written through a
+# private copy of file descriptor 1, which is then pointed at stderr, so
+# nothing the parser, C extensions or child processes print can corrupt it.
+_TEST_RUNNER = """
+import importlib.util, os, pickle, sys
+out = os.fdopen(os.dup(1), "wb")
+os.dup2(2, 1)
+sys.stdout = sys.stderr
+try:
+    spec = importlib.util.spec_from_file_location("candidate_parser", sys.argv[1])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    payload = {"df": module.parse(sys.argv[2])}
+except Exception as e:
+    import linecache, traceback
+    frames = traceback.extract_tb(e.__traceback__)
+    # Point at the deepest frame inside the candidate parser, not library internals
+    frame = next((f for f in reversed(frames) if f.filename == sys.argv[1]), frames[-1])
+    payload = {
+        "error": f"{type(e).__name__}: {e}",
+        "error_type": type(e).__name__,
+        "error_msg": str(e),
+        "line": frame.lineno,
+        "src": linecache.getline(frame.filename, frame.lineno).strip(),
+        "traceback": traceback.format_exc()[-4000:],
+    }
+try:
+    data = pickle.dumps(payload)
+except Exception as e:
+    data = pickle.dumps({"error": f"Parser output could not be pickled: {e}"})
+out.write(data)
+out.close()
+"""
+
+def _run_parser_test(parser_code: str, pdf_path: str, expected_df: pd.DataFrame, timeout: float = 30, cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Run parser code in a subprocess and compare its output against the expected frame.
+    
+    Setting `cancel` kills the subprocess, so abandoned candidates do not keep
+    running until the timeout.
+    """
+    try:
+        # Write the candidate to a uniquely named temporary module; it is closed
+        # before the child opens it, which Windows requires
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as parser_file:
+            parser_file.write(parser_code)
+            parser_path = parser_file.name
+        
+        try:
+            # Run parser in isolation; numba's on-disk cache (a fresh module path
+            # never hits it) and bytecode caches are kept out of the temp dir
+            with tempfile.TemporaryDirectory() as numba_cache_dir:
+                process = subprocess.Popen(
+                    [sys.executable, "-c", _TEST_RUNNER, parser_path, pdf_path],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    env={**os.environ, "NUMBA_CACHE_DIR": numba_cache_dir, "PYTHONDONTWRITEBYTECODE": "1"}
+                )
+                deadline = time.monotonic() + timeout
+                try:
+                    # Wait in short slices so a cancellation is noticed promptly
+                    while True:
+                        try:
+                            stdout, stderr = process.communicate(timeout=0.1)
+                            break
+                        except subprocess.TimeoutExpired:
+                            if cancel is not None and cancel.is_set():
+                                return {"success": False, "error": "Parser test cancelled"}
+                            if time.monotonic() >= deadline:
+                                raise
+                finally:
+                    if process.poll() is None:
+                        process.kill()
+                        process.communicate()
+        finally:
+            os.unlink(parser_path)
+        
+        if not stdout:
+            stderr = stderr.decode("utf-8", "replace").strip()
+            return {
+                "success": False,
+                "error": stderr[-2000:] or f"Parser process exited with code {process.returncode}"
+            }
+        
+        payload = pickle.loads(stdout)
+        if "error" in payload:
+            return {"success": False, **payload}
+        
+        result_df = payload["df"]
+        
+        # Compare results
+        is_equal, mismatches = _df_equal_fast(result_df, expected_df)
+        
+        return {
+            "success": is_equal,
+            "result_shape": result_df.shape,
+            "expected_shape": expected_df.shape,
+            "columns_match": list(result_df.columns) == list(expected_df.columns),
+            "data_match": is_equal,
+            "mismatches": mismatches
+        }
+        
+    except subprocess.TimeoutExpired:
+        return {
+            "success": False,
+            "error": f"Parser did not finish within {timeout} seconds"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"{type(e).__name__}: {e}",
+            "error_type": type(e).__name__,
+            "error_msg": str(e)
+        }
+
+class ResponseCache:
+    """On-disk LLM response cache with an exact-hash fast path and a semantic fallback.
+    
+    Responses are keyed by scope, prompt and sampling temperature, where the
+    scope identifies the bank and input files. When an `embed` function is
+    given, a miss on the exact hash falls back to the cached prompt in the same
+    scope with the most similar embedding, provided its cosine similarity
+    reaches `threshold`. Callers only store responses whose parser passed.
+    """
+    
+    def __init__(self, directory: Path, embed: Optional[Callable[[str], List[float]]] = None, threshold: float = 0.97):
+        self.cache = diskcache.Cache(str(directory))
+        self.embed = embed
+        self.threshold = threshold
+        self._pending_embeddings: Dict[str, List[float]] = {}
+    
+    @staticmethod
+    def _key(scope: str, prompt: str, temperature: float) -> str:
+        return hashlib.sha256(f"{scope}:{temperature}:{prompt}".encode("utf-8")).hexdigest()
+    
+    def _embed(self, key: str, prompt: str) -> Optional[List[float]]:
+        if key not in self._pending_embeddings:
+            try:
+                self._pending_embeddings[key] = self.embed(prompt)
+            except Exception:
+                return None
+        return self._pending_embeddings[key]
+    
+    def get(self, scope: str, prompt: str, temperature: float) -> Optional[str]:
+        """Return a cached response for the prompt, or None on a miss."""
+        key = self._key(scope, prompt, temperature)
+        if key in self.cache:
+            return self.cache[key]
+        
+        if self.embed is None:
+            return None
+        index = self.cache.get(("embeddings", scope, temperature), [])
+        if not index:
+            return None
+        query = self._embed(key, prompt)
+        if query is None:
+            return None
+        
+        keys, vectors = zip(*index)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return self.cache.get(keys[best])
+        return None
+    
+    def set(self, scope: str, prompt: str, temperature: float, response: str):
+        """Store a response and, if embeddings are enabled, index its prompt."""
+        key = self._key(scope, prompt, temperature)
+        self.cache[key] = response
+        
+        if self.embed is None:
+            return
+        vector = self._embed(key, prompt)
+        self._pending_embeddings.pop(key, None)
+        if vector is None:
+            return
+        with self.cache.transact():
+            index = self.cache.get(("embeddings", scope, temperature), [])
+            index.append((key, list(vector)))
+            self.cache[("embeddings", scope, temperature)] = index
+    
+    def discard_pending(self):
+        """Drop embeddings computed for prompts whose responses were never stored."""
+        self._pending_embeddings.clear()
+
 class ParserGenerator:
     """Main agent class for generating bank statement parsers."""
     
-    def __init__(self, api_provider: str = "google"):
+    def __init__(self, api_provider: str = "google", concurrency: int = 1, use_cache: bool = True):
         self.api_provider = api_provider
+        self.concurrency = max(1, concurrency)
         self.llm = self._setup_llm()
+        self.use_cache = use_cache
+        self._expected_df_cache: Dict[str, pd.DataFrame] = {}
+        # Fresh responses awaiting a passing test before they are cached, keyed by stripped code
+        self._uncached_responses: Dict[str, Tuple[str, str, float, str]] = {}
+        self.cache = self._setup_cache() if use_cache else None
+        
+        # Output directories for saved parsers and generated tests
+        for directory in ("custom_parsers", "tests"):
+            Path(directory).mkdir(parents=True, exist_ok=True)
         
     def _setup_llm(self):
         """Setup LLM provider based on available APIs."""
@@ -76,6 +663,7 @@ class ParserGenerator:
             if not api_key:
                 console.print("[red]GROQ_API_KEY environment variable not set![/red]")
                 sys.exit(1)
+            self.async_llm = AsyncGroq(api_key=api_key)
             return Groq(api_key=api_key)
         
         else:
@@ -83,13 +671,23 @@ class ParserGenerator:
             console.print("Please install google-generativeai or groq and set API keys.")
             sys.exit(1)
     
+    def _setup_cache(self) -> Optional[ResponseCache]:
+        """Open the on-disk response cache, if diskcache is installed."""
+        if not DISKCACHE_AVAILABLE:
+            return None
+        embed = self._embed if self.api_provider == "google" else None
+        return ResponseCache(CACHE_DIR / "responses", embed=embed)
+    
+    def _embed(self, text: str) -> List[float]:
+        """Embed a prompt for semantic cache lookups."""
+        return genai.embed_content(model="models/text-embedding-004", content=text)["embedding"]
+    
     def analyze_pdf_structure(self, pdf_path: str) -> str:
         """Analyze PDF structure and extract text content."""
         try:
             # For demo purposes, we'll read the text file representation
             if pdf_path.endswith('.txt'):
-                with open(pdf_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = _read_pdf_text(pdf_path, os.path.getmtime(pdf_path))
             else:
                 # In real implementation, use pdfplumber or PyPDF2
                 content = "PDF content would be extracted here"
@@ -101,7 +699,8 @@ class ParserGenerator:
     def analyze_csv_schema(self, csv_path: str) -> Dict[str, Any]:
         """Analyze CSV schema and structure."""
         try:
-            df = pd.read_csv(csv_path)
+            df = load_csv(csv_path)
+            self._expected_df_cache[csv_path] = df
             schema = {
                 "columns": list(df.columns),
                 "dtypes": df.dtypes.to_dict(),
@@ -112,156 +711,327 @@ class ParserGenerator:
         except Exception as e:
             return {"error": str(e)}
     
-    def generate_parser_code(self, pdf_content: str, csv_schema: Dict[str, Any], bank_name: str) -> str:
-        """Generate parser code using LLM."""
+    async def _agenerate(self, prompt: str, temperature: float = 0.1, scope: str = "") -> str:
+        """Send a prompt to the LLM without blocking the event loop.
         
-        prompt = f"""
-You are an expert Python developer specializing in PDF parsing. Create a custom parser for {bank_name} bank statements.
-
-PDF Content Structure:
-{pdf_content}
-
-Expected CSV Schema:
-{json.dumps(csv_schema, indent=2)}
-
-Requirements:
-1. Create a function `parse(pdf_path: str) -> pd.DataFrame`
-2. The function must return a DataFrame matching the CSV schema exactly
-3. Handle date parsing, number formatting, and text extraction
-4. Include proper error handling and validation
-5. Use pandas, pdfplumber, and other standard libraries
-6. Add comprehensive docstrings and type hints
-
-Generate ONLY the Python code, no explanations:
-"""
+        Responses are served from the response cache when enabled. Fresh ones
+        are only stored by `_remember_response` once their parser has passed,
+        so a failed run is not replayed on the next one.
+        """
+        if self.cache is not None:
+            cached = await asyncio.get_running_loop().run_in_executor(None, self.cache.get, scope, prompt, temperature)
+            if cached is not None:
+                return cached
+        
+        response, complete = await self._arequest(prompt, temperature)
+        
+        # Abandoned streams are never worth replaying
+        if self.cache is not None and complete:
+            self._uncached_responses[_strip_code_fences(response)] = (scope, prompt, temperature, response)
+        return response
+    
+    async def _remember_response(self, parser_code: str):
+        """Cache the response that produced a passing parser."""
+        entry = self._uncached_responses.pop(parser_code, None)
+        if self.cache is not None and entry is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.set, *entry)
+    
+    async def _arequest(self, prompt: str, temperature: float) -> Tuple[str, bool]:
+        """Stream a completion from the configured LLM provider.
         
+        Returns the text and whether the stream ran to completion. Streaming
+        stops early once the received code has a syntax error that further
+        tokens cannot fix, so bad candidates do not pay for their tail.
+        """
+        chunks = []
+        stream = self._astream(prompt, temperature)
         try:
-            if self.api_provider == "google":
-                response = self.llm.generate_content(prompt)
-                return response.text
-            elif self.api_provider == "groq":
-                response = self.llm.chat.completions.create(
-                    model="llama3-8b-8192",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.1
-                )
-                return response.choices[0].message.content
-        except Exception as e:
-            return f"# Error generating code: {str(e)}\n\n# Placeholder parser code\nimport pandas as pd\n\ndef parse(pdf_path: str) -> pd.DataFrame:\n    return pd.DataFrame()"
+            async for text in stream:
+                chunks.append(text)
+                if "\n" in text and _stream_is_broken("".join(chunks)):
+                    return "".join(chunks), False
+        finally:
+            # Close the provider stream now rather than when the generator is collected
+            await stream.aclose()
+        return "".join(chunks), True
     
-    def test_parser(self, parser_code: str, pdf_path: str, csv_path: str) -> Dict[str, Any]:
-        """Test the generated parser against the expected CSV."""
+    async def _astream(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        """Yield response text chunks from the configured LLM provider."""
+        if self.api_provider == "google":
+            response = await self.llm.generate_content_async(
+                prompt,
+                generation_config={"temperature": temperature},
+                stream=True
+            )
+            async for chunk in response:
+                yield chunk.text
+        elif self.api_provider == "groq":
+            stream = await self.async_llm.chat.completions.create(
+                model="llama3-8b-8192",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                stream=True
+            )
+            try:
+                async for chunk in stream:
+                    yield chunk.choices[0].delta.content or ""
+            finally:
+                await stream.close()
+    
+    def build_generation_prompt(self, pdf_content: str, csv_schema: Dict[str, Any], bank_name: str, schema_json: Optional[str] = None) -> str:
+        """Build the initial parser-generation prompt."""
+        return _GEN_TEMPLATE.render(
+            bank_name=bank_name,
+            pdf_content=pdf_content,
+            schema_json=schema_json or _schema_json(csv_schema),
+            skeleton=PARSER_SKELETON
+        )
+    
+    async def generate_parser_code(self, pdf_content: str, csv_schema: Dict[str, Any], bank_name: str, temperature: float = 0.1, schema_json: Optional[str] = None, scope: str = "") -> str:
+        """Generate parser code using LLM.
+        
+        LLM errors propagate so the agent loop can report them.
+        """
+        
+        prompt = self.build_generation_prompt(pdf_content, csv_schema, bank_name, schema_json)
+        return await self._agenerate(prompt, temperature, scope)
+    
+    def submit_batch(self, prompts: Dict[str, str]) -> str:
+        """Submit one generation request per bank as a single Batch API job.
+        
+        Returns the batch job id. Only the Groq provider exposes a Batch API.
+        """
+        if self.api_provider != "groq":
+            raise ValueError(f"Batch mode is not supported for provider '{self.api_provider}'")
+        
+        lines = []
+        for bank_name, prompt in prompts.items():
+            lines.append(json.dumps({
+                "custom_id": bank_name,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": "llama3-8b-8192",
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.1
+                }
+            }))
+        
+        batch_file = self.llm.files.create(
+            file=("parser_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        job = self.llm.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return job.id
+    
+    def poll_batch(self, job_id: str, poll_interval: float = 10.0) -> Iterator[Tuple[str, str]]:
+        """Wait for a batch job to finish and yield `(bank_name, parser_code)` pairs."""
+        while True:
+            job = self.llm.batches.retrieve(job_id)
+            if job.status == "completed":
+                break
+            if job.status in ("failed", "expired", "cancelled"):
+                raise RuntimeError(f"Batch job {job_id} ended with status '{job.status}'")
+            time.sleep(poll_interval)
+        
+        # Requests that failed go to a separate error file; a job where every
+        # request failed has no output file at all
+        for file_id in (job.output_file_id, getattr(job, "error_file_id", None)):
+            if not file_id:
+                continue
+            content = self.llm.files.content(file_id).read().decode("utf-8")
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    yield record["custom_id"], _strip_code_fences(response["body"]["choices"][0]["message"]["content"])
+                else:
+                    error = record.get("error") or (response.get("body") or {}).get("error") or f"status {response.get('status_code')}"
+                    console.print(f"[red]❌ {record.get('custom_id')}: batch request failed: {error}[/red]")
+    
+    def test_parser(self, parser_code: str, pdf_path: str, csv_path: str, cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Test the generated parser against the expected CSV.
+        
+        Setting `cancel` stops a test that is still running.
+        """
+        # Syntax errors do not need a subprocess to be found
         try:
-            # Create temporary parser file
-            parser_file = f"temp_parser_{datetime.now().strftime('%Y%m%d_%H%M%S')}.py"
-            
-            with open(parser_file, 'w') as f:
-                f.write(parser_code)
-            
-            # Import and test the parser
-            import importlib.util
-            spec = importlib.util.spec_from_file_location("temp_parser", parser_file)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # Run parser
-            result_df = module.parse(pdf_path)
-            expected_df = pd.read_csv(csv_path)
-            
-            # Compare results
-            is_equal = result_df.equals(expected_df)
-            
-            # Cleanup
-            os.remove(parser_file)
-            
+            parser_code = _clean_and_validate(parser_code)
+        except SyntaxError as e:
             return {
-                "success": is_equal,
-                "result_shape": result_df.shape,
-                "expected_shape": expected_df.shape,
-                "columns_match": list(result_df.columns) == list(expected_df.columns),
-                "data_match": is_equal
+                "success": False,
+                "error": f"SyntaxError: {e.msg} at line {e.lineno}"
             }
-            
-        except Exception as e:
+        except ValueError as e:
             return {
                 "success": False,
                 "error": str(e)
             }
+        
+        expected_df = self._expected_df_cache.get(csv_path)
+        if expected_df is None:
+            expected_df = self._expected_df_cache[csv_path] = load_csv(csv_path)
+        return _run_parser_test(parser_code, pdf_path, expected_df, cancel=cancel)
     
-    def fix_parser_code(self, parser_code: str, test_results: Dict[str, Any], pdf_content: str, csv_schema: Dict[str, Any]) -> str:
-        """Fix parser code based on test results."""
+    async def fix_parser_code(self, parser_code: str, test_results: Dict[str, Any], pdf_content: str, csv_schema: Dict[str, Any], temperature: float = 0.1, schema_json: Optional[str] = None, scope: str = "") -> str:
+        """Fix parser code based on test results.
         
-        error_analysis = f"""
-Previous parser failed with these issues:
-{json.dumps(test_results, indent=2)}
-
-PDF Content:
-{pdf_content}
-
-Expected Schema:
-{json.dumps(csv_schema, indent=2)}
-
-Previous Code:
-{parser_code}
-
-Please fix the parser code to address the issues above. Focus on:
-1. Correct column names and data types
-2. Proper date parsing
-3. Number formatting
-4. Text extraction logic
-5. Error handling
-
-Generate ONLY the corrected Python code:
-"""
+        LLM errors propagate so the agent loop can report them.
+        """
         
-        try:
-            if self.api_provider == "google":
-                response = self.llm.generate_content(error_analysis)
-                return response.text
-            elif self.api_provider == "groq":
-                response = self.llm.chat.completions.create(
-                    model="llama3-8b-8192",
-                    messages=[{"role": "user", "content": error_analysis}],
-                    temperature=0.1
+        error_analysis = _FIX_TEMPLATE.render(
+            test_results_json=json.dumps(test_results, indent=2, default=str),
+            pdf_content=pdf_content,
+            schema_json=schema_json or _schema_json(csv_schema),
+            parser_code=parser_code
+        )
+        return await self._agenerate(error_analysis, temperature, scope)
+    
+    def candidate_temperatures(self, count: Optional[int] = None, palette: tuple = CANDIDATE_TEMPERATURES) -> List[float]:
+        """Sampling temperatures for the concurrent candidates of one attempt."""
+        count = count or self.concurrency
+        if count == 1:
+            return [0.1]
+        return [palette[i % len(palette)] for i in range(count)]
+    
+    async def _first_passing(self, requests: List[Any], state: AgentState, executor: ThreadPoolExecutor) -> bool:
+        """Test candidates as their generations arrive; stop at the first that passes."""
+        loop = asyncio.get_running_loop()
+        
+        async def generate_and_test(request):
+            parser_code = _strip_code_fences(await request)
+            # Cancelling the task cannot interrupt the executor thread, so tell
+            # the running test to kill its subprocess instead
+            cancel = threading.Event()
+            try:
+                test_result = await loop.run_in_executor(
+                    executor,
+                    functools.partial(self.test_parser, parser_code, state.pdf_path, state.csv_path, cancel=cancel)
                 )
-                return response.choices[0].message.content
-        except Exception as e:
-            return parser_code  # Return original if fix fails
+            except asyncio.CancelledError:
+                cancel.set()
+                raise
+            return parser_code, test_result
+        
+        tasks = [asyncio.ensure_future(generate_and_test(request)) for request in requests]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                try:
+                    parser_code, test_result = await finished
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    state.errors.append(error)
+                    console.print(f"[red]Candidate generation failed: {error}[/red]")
+                    continue
+                state.parser_code = parser_code
+                state.test_results.append(test_result)
+                if test_result.get("success", False):
+                    await self._remember_response(parser_code)
+                    return True
+            return False
+        finally:
+            for task in tasks:
+                task.cancel()
     
     def run_agent_loop(self, state: AgentState) -> AgentState:
-        """Main agent loop: plan → generate → test → fix."""
+        """Synchronous wrapper around `arun_agent_loop`."""
+        return asyncio.run(self.arun_agent_loop(state))
+    
+    async def arun_agent_loop(self, state: AgentState) -> AgentState:
+        """Main agent loop: plan → generate → test → fix.
+        
+        The first attempt speculatively samples `max_attempts` parsers at once;
+        the remaining attempts are spent fixing the last failing candidate.
+        """
         
         console.print(Panel(f"[bold blue]Starting Agent Loop for {state.target_bank}[/bold blue]"))
+        loop = asyncio.get_running_loop()
         
-        while state.attempt <= state.max_attempts and not state.success:
-            console.print(f"\n[bold yellow]Attempt {state.attempt}/{state.max_attempts}[/bold yellow]")
-            
-            # Step 1: Analyze inputs
-            with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
-                task = progress.add_task("Analyzing PDF structure...", total=None)
-                pdf_content = self.analyze_pdf_structure(state.pdf_path)
-                progress.update(task, description="Analyzing CSV schema...")
-                csv_schema = self.analyze_csv_schema(state.csv_path)
-            
-            # Step 2: Generate parser code
-            console.print("[green]Generating parser code...[/green]")
-            if state.attempt == 1:
-                state.parser_code = self.generate_parser_code(pdf_content, csv_schema, state.target_bank)
+        # Reuse a parser already validated against these exact inputs
+        scope = input_digest(state) if self.use_cache else ""
+        cache_path = parser_cache_path(scope) if self.use_cache else None
+        if cache_path is not None and cache_path.exists():
+            parser_code = cache_path.read_text(encoding="utf-8")
+            test_result = await loop.run_in_executor(None, self.test_parser, parser_code, state.pdf_path, state.csv_path)
+            if test_result.get("success", False):
+                state.parser_code = parser_code
+                state.test_results.append(test_result)
+                state.success = True
+                console.print(f"[bold green]✅ Reused cached parser: {cache_path}[/bold green]")
+                return state
+        
+        # Step 1: Analyze inputs (they do not change between attempts)
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
+            task = progress.add_task("Analyzing PDF structure...", total=None)
+            pdf_content = self.analyze_pdf_structure(state.pdf_path)
+            progress.update(task, description="Analyzing CSV schema...")
+            csv_schema = self.analyze_csv_schema(state.csv_path)
+        schema_json = _schema_json(csv_schema)
+        
+        # Known layouts are synthesized from a template instead of asking the LLM
+        template = BANK_TEMPLATES.get(frozenset(csv_schema.get("columns", [])))
+        parser_code = None
+        if template is not None:
+            try:
+                layout_text = _read_layout_text(state.pdf_path)
+            except Exception as e:
+                console.print(f"[yellow]Could not read statement layout ({e}), skipping templates[/yellow]")
             else:
-                state.parser_code = self.fix_parser_code(state.parser_code, state.test_results[-1], pdf_content, csv_schema)
-            
-            # Step 3: Test parser
-            console.print("[green]Testing parser...[/green]")
-            test_result = self.test_parser(state.parser_code, state.pdf_path, state.csv_path)
+                parser_code = template(csv_schema, layout_text)
+        if parser_code is not None:
+            console.print("[green]Matched a known statement layout, testing template parser...[/green]")
+            test_result = await loop.run_in_executor(None, self.test_parser, parser_code, state.pdf_path, state.csv_path)
             state.test_results.append(test_result)
-            
             if test_result.get("success", False):
+                state.parser_code = parser_code
                 state.success = True
-                console.print("[bold green]✅ Parser generated successfully![/bold green]")
-                break
+                console.print("[bold green]✅ Template parser generated successfully![/bold green]")
             else:
-                console.print(f"[red]❌ Test failed: {test_result.get('error', 'Unknown error')}[/red]")
-                state.attempt += 1
+                console.print(f"[yellow]Template parser failed ({test_result.get('error', 'output mismatch')}), falling back to LLM[/yellow]")
+        
+        executor = ThreadPoolExecutor()
+        try:
+            while state.attempt <= state.max_attempts and not state.success:
+                console.print(f"\n[bold yellow]Attempt {state.attempt}/{state.max_attempts}[/bold yellow]")
+                
+                # Step 2: Generate candidate parsers concurrently
+                if state.attempt == 1:
+                    temperatures = self.candidate_temperatures(max(state.max_attempts, self.concurrency), SPECULATIVE_TEMPERATURES)
+                    requests = [self.generate_parser_code(pdf_content, csv_schema, state.target_bank, t, schema_json, scope) for t in temperatures]
+                else:
+                    temperatures = self.candidate_temperatures()
+                    requests = [self.fix_parser_code(state.parser_code, state.test_results[-1], pdf_content, csv_schema, t, schema_json, scope) for t in temperatures]
+                console.print(f"[green]Generating and testing {len(temperatures)} candidate parser(s)...[/green]")
+                
+                # Step 3: Test candidates as they arrive, keeping the first one that passes
+                state.success = await self._first_passing(requests, state, executor)
+                
+                if state.success:
+                    console.print("[bold green]✅ Parser generated successfully![/bold green]")
+                    break
+                else:
+                    if state.test_results:
+                        last_error = state.test_results[-1].get('error', 'Unknown error')
+                    else:
+                        last_error = state.errors[-1] if state.errors else 'No candidates generated'
+                    console.print(f"[red]❌ Test failed: {last_error}[/red]")
+                    state.attempt += 1
+        finally:
+            # Queued tests were cancelled along with the candidate tasks
+            executor.shutdown(wait=False)
+            self._uncached_responses.clear()
+            if self.cache is not None:
+                self.cache.discard_pending()
+        
+        if state.success and cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(state.parser_code, encoding="utf-8")
         
         return state
     
@@ -269,46 +1039,147 @@ Generate ONLY the corrected Python code:
         """Save the generated parser to custom_parsers directory."""
         parser_file = f"custom_parsers/{bank_name}_parser.py"
         
-        # Ensure directory exists
-        os.makedirs("custom_parsers", exist_ok=True)
-        
         with open(parser_file, 'w') as f:
             f.write(parser_code)
         
         console.print(f"[green]Parser saved to: {parser_file}[/green]")
         return parser_file
 
+def resolve_paths(target: str, pdf: Optional[str] = None, csv: Optional[str] = None) -> Tuple[str, str]:
+    """Resolve and validate the PDF/CSV paths for a target bank."""
+    # Set default paths
+    if not pdf:
+        pdf = f"data/{target}/{target}_sample.pdf"
+    if not csv:
+        csv = f"data/{target}/{target}_sample.csv"
+    
+    # Handle text file for demo
+    if not os.path.exists(pdf) and os.path.exists(pdf + ".txt"):
+        pdf = pdf + ".txt"
+    
+    # Validate inputs
+    if not os.path.exists(pdf):
+        console.print(f"[red]PDF file not found: {pdf}[/red]")
+        sys.exit(1)
+    
+    if not os.path.exists(csv):
+        console.print(f"[red]CSV file not found: {csv}[/red]")
+        sys.exit(1)
+    
+    return pdf, csv
+
+def write_test_file(target: str, pdf_path: str, csv_path: str) -> str:
+    """Generate a pytest file for a saved parser."""
+    test_file = f"tests/test_{target}_parser.py"
+    
+    test_code = f'''import pytest
+import pandas as pd
+from custom_parsers.{target}_parser import parse
+
+def test_{target}_parser():
+    """Test the generated {target} parser."""
+    pdf_path = "{pdf_path}"
+    expected_csv = "{csv_path}"
+    
+    # Run parser
+    result_df = parse(pdf_path)
+    expected_df = pd.read_csv(expected_csv, engine="{CSV_ENGINE}")
+    
+    # Assert equality
+    assert result_df.equals(expected_df), f"Parser output does not match expected CSV"
+    print("✅ Parser test passed!")
+
+if __name__ == "__main__":
+    test_{target}_parser()
+'''
+    
+    with open(test_file, 'w') as f:
+        f.write(test_code)
+    
+    console.print(f"[green]Test file generated: {test_file}[/green]")
+    return test_file
+
+def run_batch(agent: ParserGenerator, targets: List[str]) -> List[str]:
+    """Generate parsers for several banks through one Batch API job.
+    
+    Returns the targets whose generated parser passed its test.
+    """
+    paths = {target: resolve_paths(target) for target in targets}
+    prompts = {
+        target: agent.build_generation_prompt(
+            agent.analyze_pdf_structure(pdf_path),
+            agent.analyze_csv_schema(csv_path),
+            target
+        )
+        for target, (pdf_path, csv_path) in paths.items()
+    }
+    
+    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
+        task = progress.add_task(f"Submitting batch for {len(targets)} bank(s)...", total=None)
+        job_id = agent.submit_batch(prompts)
+        progress.update(task, description=f"Waiting for batch job {job_id}...")
+        generated = dict(agent.poll_batch(job_id))
+    
+    # Test all returned parsers in parallel
+    console.print(f"[green]Testing {len(generated)} parser(s)...[/green]")
+    with ThreadPoolExecutor() as executor:
+        futures = {
+            target: executor.submit(agent.test_parser, parser_code, *paths[target])
+            for target, parser_code in generated.items()
+        }
+        results = {target: future.result() for target, future in futures.items()}
+    
+    passed = []
+    for target in targets:
+        test_result = results.get(target)
+        if test_result is None:
+            console.print(f"[red]❌ {target}: no response in batch output[/red]")
+        elif test_result.get("success", False):
+            agent.save_parser(generated[target], target)
+            write_test_file(target, *paths[target])
+            passed.append(target)
+        else:
+            console.print(f"[red]❌ {target}: {test_result.get('error', 'Unknown error')}[/red]")
+    return passed
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(description="AI Agent for Bank Statement Parser Generation")
-    parser.add_argument("--target", required=True, help="Target bank name (e.g., icici)")
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument("--target", help="Target bank name (e.g., icici)")
+    target_group.add_argument("--targets", help="Comma-separated target bank names (e.g., icici,sbi,hdfc)")
     parser.add_argument("--pdf", help="Path to PDF file (default: data/{target}/{target}_sample.pdf)")
     parser.add_argument("--csv", help="Path to CSV file (default: data/{target}/{target}_sample.csv)")
     parser.add_argument("--provider", choices=["google", "groq"], default="google", help="LLM provider")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of candidate parsers requested concurrently per attempt")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the LLM instead of reusing cached responses and parsers")
+    parser.add_argument("--mode", choices=["realtime", "batch"], default="realtime", help="Generate through realtime calls or one Batch API job (groq only)")
     
     args = parser.parse_args()
     
-    # Set default paths
-    if not args.pdf:
-        args.pdf = f"data/{args.target}/{args.target}_sample.pdf"
-    if not args.csv:
-        args.csv = f"data/{args.target}/{args.target}_sample.csv"
-    
-    # Handle text file for demo
-    if not os.path.exists(args.pdf) and os.path.exists(args.pdf + ".txt"):
-        args.pdf = args.pdf + ".txt"
+    if args.mode == "batch":
+        if args.provider != "groq":
+            console.print("[red]Batch mode requires --provider groq[/red]")
+            sys.exit(1)
+        if args.pdf or args.csv:
+            console.print("[red]--pdf/--csv are not supported with --mode batch; inputs are read from data/{target}/[/red]")
+            sys.exit(1)
+        targets = [t.strip() for t in (args.targets or args.target).split(",") if t.strip()]
+        agent = ParserGenerator(api_provider=args.provider, concurrency=args.concurrency, use_cache=not args.no_cache)
+        passed = run_batch(agent, targets)
+        console.print(f"\n[bold]{len(passed)}/{len(targets)} parser(s) generated successfully[/bold]")
+        if len(passed) != len(targets):
+            sys.exit(1)
+        return
     
-    # Validate inputs
-    if not os.path.exists(args.pdf):
-        console.print(f"[red]PDF file not found: {args.pdf}[/red]")
+    if args.targets:
+        console.print("[red]--targets requires --mode batch[/red]")
         sys.exit(1)
     
-    if not os.path.exists(args.csv):
-        console.print(f"[red]CSV file not found: {args.csv}[/red]")
-        sys.exit(1)
+    args.pdf, args.csv = resolve_paths(args.target, args.pdf, args.csv)
     
     # Initialize agent
-    agent = ParserGenerator(api_provider=args.provider)
+    agent = ParserGenerator(api_provider=args.provider, concurrency=args.concurrency, use_cache=not args.no_cache)
     
     # Create initial state
     state = AgentState(
@@ -318,41 +1189,15 @@ def main():
     )
     
     # Run agent loop
-    final_state = agent.run_agent_loop(state)
+    final_state = asyncio.run(agent.arun_agent_loop(state))
     
     if final_state.success:
         # Save parser
         parser_file = agent.save_parser(final_state.parser_code, args.target)
         
         # Generate test file
-        test_file = f"tests/test_{args.target}_parser.py"
-        os.makedirs("tests", exist_ok=True)
-        
-        test_code = f'''import pytest
-import pandas as pd
-from custom_parsers.{args.target}_parser import parse
-
-def test_{args.target}_parser():
-    """Test the generated {args.target} parser."""
-    pdf_path = "{args.pdf}"
-    expected_csv = "{args.csv}"
-    
-    # Run parser
-    result_df = parse(pdf_path)
-    expected_df = pd.read_csv(expected_csv)
-    
-    # Assert equality
-    assert result_df.equals(expected_df), f"Parser output does not match expected CSV"
-    print("✅ Parser test passed!")
-
-if __name__ == "__main__":
-    test_{args.target}_parser()
-'''
-        
-        with open(test_file, 'w') as f:
-            f.write(test_code)
+        test_file = write_test_file(args.target, args.pdf, args.csv)
         
-        console.print(f"[green]Test file generated: {test_file}[/green]")
         console.print("\n[bold green]🎉 Agent completed successfully![/bold green]")
         console.print(f"Run: pytest {test_file} -v")
         
@@ -7,6 +7,7 @@ import os
 import sys
 import json
 import argparse
+import tempfile
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 import pandas as pd
@@ -39,6 +40,10 @@ class DemoParserGenerator:
     
     def __init__(self):
         console.print("[yellow]Running in DEMO mode - no API keys required[/yellow]")
+        
+        # Output directories for saved parsers and generated tests
+        for directory in ("custom_parsers", "tests"):
+            Path(directory).mkdir(parents=True, exist_ok=True)
     
     def analyze_pdf_structure(self, pdf_path: str) -> str:
         """Analyze PDF structure and extract text content."""
@@ -210,27 +215,27 @@ if __name__ == "__main__":
         """Test the generated parser against the expected CSV."""
         try:
             # Create temporary parser file
-            parser_file = f"temp_parser_{datetime.now().strftime('%Y%m%d_%H%M%S')}.py"
-            
-            with open(parser_file, 'w') as f:
+            with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
                 f.write(parser_code)
+                parser_file = f.name
             
-            # Import and test the parser
-            import importlib.util
-            spec = importlib.util.spec_from_file_location("temp_parser", parser_file)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # Run parser
-            result_df = module.parse(pdf_path)
-            expected_df = pd.read_csv(csv_path)
+            try:
+                # Import and test the parser
+                import importlib.util
+                spec = importlib.util.spec_from_file_location("temp_parser", parser_file)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                
+                # Run parser
+                result_df = module.parse(pdf_path)
+                expected_df = pd.read_csv(csv_path)
+            finally:
+                # Cleanup
+                os.unlink(parser_file)
             
             # Compare results
             is_equal = result_df.equals(expected_df)
             
-            # Cleanup
-            os.remove(parser_file)
-            
             return {
                 "success": is_equal,
                 "result_shape": result_df.shape,
@@ -283,23 +288,20 @@ if __name__ == "__main__":
         """Save the generated parser to custom_parsers directory."""
         parser_file = f"custom_parsers/{bank_name}_parser.py"
         
-        # Ensure directory exists
-        os.makedirs("custom_parsers", exist_ok=True)
-        
         with open(parser_file, 'w') as f:
             f.write(parser_code)
         
         console.print(f"[green]Parser saved to: {parser_file}[/green]")
         return parser_file
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main CLI entry point for demo."""
     parser = argparse.ArgumentParser(description="Demo AI Agent for Bank Statement Parser Generation")
     parser.add_argument("--target", required=True, help="Target bank name (e.g., icici)")
     parser.add_argument("--pdf", help="Path to PDF file (default: data/{target}/{target}_sample.pdf)")
     parser.add_argument("--csv", help="Path to CSV file (default: data/{target}/{target}_sample.csv)")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Set default paths
     if not args.pdf:
@@ -348,7 +350,6 @@ def main():
         
         # Generate test file
         test_file = f"tests/test_{args.target}_parser.py"
-        os.makedirs("tests", exist_ok=True)
         
         test_code = f'''import pytest
 import pandas as pd
@@ -5,11 +5,12 @@ Comprehensive demo of the AI Agent for Bank Statement Parser Generation
 
 import os
 import sys
-import subprocess
+import io
+import contextlib
+import importlib
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
 
 console = Console()
 
@@ -52,14 +53,10 @@ def run_demo():
         table.add_column("Credit", style="green")
         table.add_column("Balance", style="blue")
         
-        for _, row in df.head(5).iterrows():
-            table.add_row(
-                str(row['Date']),
-                str(row['Description']),
-                str(row['Debit']) if pd.notna(row['Debit']) else '',
-                str(row['Credit']) if pd.notna(row['Credit']) else '',
-                str(row['Balance'])
-            )
+        columns = ['Date', 'Description', 'Debit', 'Credit', 'Balance']
+        rows = df.head(5)[columns].astype(object).where(pd.notna, '').astype(str).to_numpy()
+        for row in rows:
+            table.add_row(*row)
         console.print(table)
     except Exception as e:
         console.print(f"[red]Error reading CSV: {e}[/red]")
@@ -67,64 +64,46 @@ def run_demo():
     # Step 3: Run the agent
     console.print("\n[bold yellow]Step 3: Running AI Agent[/bold yellow]")
     
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
-        task = progress.add_task("Starting agent...", total=None)
+    # The demo agent shows its own progress display, and rich allows only one
+    # live display at a time, so no spinner wraps this step
+    console.print("Starting agent...")
+    output = io.StringIO()
+    try:
+        # Run the demo agent in-process
+        agent_demo = importlib.import_module("agent_demo")
+        with contextlib.redirect_stdout(output):
+            agent_demo.main(["--target", "icici"])
         
-        try:
-            # Run the demo agent
-            result = subprocess.run(
-                ["python", "agent_demo.py", "--target", "icici"],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+        console.print("[green]Agent execution successful![/green]")
+        console.print(output.getvalue(), markup=False)
             
-            if result.returncode == 0:
-                progress.update(task, description="Agent completed successfully!")
-                console.print("[green]Agent execution successful![/green]")
-                console.print(result.stdout)
-            else:
-                progress.update(task, description="Agent failed!")
-                console.print("[red]Agent execution failed![/red]")
-                console.print(result.stderr)
-                
-        except subprocess.TimeoutExpired:
-            progress.update(task, description="Agent timed out!")
-            console.print("[red]Agent execution timed out![/red]")
-        except Exception as e:
-            progress.update(task, description="Agent error!")
-            console.print(f"[red]Agent execution error: {e}[/red]")
+    except SystemExit:
+        console.print("[red]Agent execution failed![/red]")
+        console.print(output.getvalue(), markup=False)
+    except Exception as e:
+        console.print(f"[red]Agent execution error: {e}[/red]")
     
     # Step 4: Test the generated parser
     console.print("\n[bold yellow]Step 4: Testing Generated Parser[/bold yellow]")
     
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
-        task = progress.add_task("Testing parser...", total=None)
+    # A live spinner would be captured by redirect_stdout, as rich looks up
+    # sys.stdout on every refresh, so this step prints plain status lines
+    console.print("Testing parser...")
+    output = io.StringIO()
+    try:
+        # Run the test in-process
+        from test_parser import test_parser
+        with contextlib.redirect_stdout(output):
+            passed = test_parser("icici")
         
-        try:
-            # Run the test
-            result = subprocess.run(
-                ["python", "test_parser.py", "icici"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+        if passed:
+            console.print("[green]Parser test successful![/green]")
+        else:
+            console.print("[red]Parser test failed![/red]")
+        console.print(output.getvalue(), markup=False)
             
-            if result.returncode == 0:
-                progress.update(task, description="Test passed!")
-                console.print("[green]Parser test successful![/green]")
-                console.print(result.stdout)
-            else:
-                progress.update(task, description="Test failed!")
-                console.print("[red]Parser test failed![/red]")
-                console.print(result.stderr)
-                
-        except subprocess.TimeoutExpired:
-            progress.update(task, description="Test timed out!")
-            console.print("[red]Parser test timed out![/red]")
-        except Exception as e:
-            progress.update(task, description="Test error!")
-            console.print(f"[red]Parser test error: {e}[/red]")
+    except Exception as e:
+        console.print(f"[red]Parser test error: {e}[/red]")
     
     # Step 5: Show generated files
     console.print("\n[bold yellow]Step 5: Generated Files[/bold yellow]")
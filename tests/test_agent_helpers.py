@@ -0,0 +1,230 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agent
+from agent import (
+    AgentState,
+    ParserGenerator,
+    ResponseCache,
+    _clean_and_validate,
+    _df_equal_fast,
+    _read_layout_text,
+    _run_parser_test,
+    _stream_is_broken,
+    _strip_code_fences,
+    _table_layout_parser,
+    input_digest,
+    load_csv,
+    parser_cache_path,
+)
+
+ICICI_DIR = Path(__file__).resolve().parent.parent / "data" / "icici"
+
+# Descriptions run past the Debit label, so the columns are not fixed-width
+LAYOUT_TEXT = (
+    "Date        Description     Debit     Credit    Balance\n"
+    "01-08-2024  Salary Credit XYZ Pvt Ltd  1652.61   8517.19\n"
+    "02-08-2024  ATM Cash 1234  500.00               8017.19\n"
+    "Page 1 of 1\n"
+)
+
+def test_df_equal_fast_treats_missing_values_as_equal():
+    df = pd.DataFrame({"Debit": [1.0, np.nan], "Credit": [np.nan, 2.0]})
+    ok, diffs = _df_equal_fast(df, df.copy())
+    assert ok
+    assert diffs == {}
+
+def test_df_equal_fast_reports_value_mismatches():
+    got = pd.DataFrame({"Balance": [1.0, 2.0, 3.0]})
+    expected = pd.DataFrame({"Balance": [1.0, 2.5, 3.0]})
+    ok, diffs = _df_equal_fast(got, expected)
+    assert not ok
+    assert diffs["Balance"]["mismatched_rows"] == 1
+    assert diffs["Balance"]["examples"] == [{"row": 1, "got": "2.0", "expected": "2.5"}]
+
+def test_df_equal_fast_reports_dtype_mismatch():
+    got = pd.DataFrame({"Debit": [1, 2]})
+    expected = pd.DataFrame({"Debit": [1.0, 2.0]})
+    ok, diffs = _df_equal_fast(got, expected)
+    assert not ok
+    assert "dtype" in diffs["Debit"]
+
+def test_df_equal_fast_reports_shape_mismatch():
+    got = pd.DataFrame({"Debit": [1.0]})
+    expected = pd.DataFrame({"Debit": [1.0, 2.0]})
+    ok, diffs = _df_equal_fast(got, expected)
+    assert not ok
+    assert "shape" in diffs
+
+@pytest.mark.parametrize("text", [
+    "```Python\nx = 1\n```",
+    "```python3\nx = 1\n```",
+    "Here is the parser:\n\n```python\nx = 1\n```\nIt parses the statement.",
+    "x = 1\n",
+])
+def test_strip_code_fences(text):
+    assert _strip_code_fences(text) == "x = 1"
+
+def test_clean_and_validate_rejects_empty_code():
+    with pytest.raises(ValueError):
+        _clean_and_validate("```python\n   \n```")
+
+def test_clean_and_validate_rejects_invalid_code():
+    with pytest.raises(SyntaxError):
+        _clean_and_validate("```python\ndef parse(pdf_path)\n    pass\n```")
+
+def test_stream_is_broken_ignores_prose_preamble():
+    text = "The parser:\n  - reads the PDF\n- builds the frame\n\n```python\ndef parse(path):\n"
+    assert not _stream_is_broken(text)
+
+def test_stream_is_broken_detects_bad_dedent():
+    text = "```python\ndef parse(path):\n        x = 1\n    return x\n"
+    assert _stream_is_broken(text)
+
+def test_stream_is_broken_allows_unclosed_brackets():
+    text = "```python\nCOLUMNS = [\n    'Date',\n"
+    assert not _stream_is_broken(text)
+
+def test_run_parser_test_ignores_output_written_to_stdout(tmp_path):
+    parser_code = (
+        "import os\n"
+        "import pandas as pd\n"
+        "def parse(pdf_path):\n"
+        "    os.write(1, b'hi')\n"
+        "    print('parsing', pdf_path)\n"
+        "    return pd.DataFrame({'Balance': [1.0, 2.0]})\n"
+    )
+    expected = pd.DataFrame({"Balance": [1.0, 2.0]})
+    result = _run_parser_test(parser_code, str(tmp_path / "statement.pdf"), expected)
+    assert result["success"], result
+
+def test_run_parser_test_reports_failing_parser_line(tmp_path):
+    parser_code = (
+        "import pandas as pd\n"
+        "def parse(pdf_path):\n"
+        "    rows = []\n"
+        "    raise ValueError('no transactions found')\n"
+    )
+    result = _run_parser_test(parser_code, str(tmp_path / "statement.pdf"), pd.DataFrame())
+    assert not result["success"]
+    assert result["error_type"] == "ValueError"
+    assert result["error_msg"] == "no transactions found"
+    assert result["line"] == 4
+    assert result["src"] == "raise ValueError('no transactions found')"
+    assert "Traceback" in result["traceback"]
+
+def test_run_parser_test_reports_exit_code(tmp_path):
+    parser_code = (
+        "import sys\n"
+        "def parse(pdf_path):\n"
+        "    sys.exit(3)\n"
+    )
+    result = _run_parser_test(parser_code, str(tmp_path / "statement.pdf"), pd.DataFrame())
+    assert not result["success"]
+    assert result["error"] == "Parser process exited with code 3"
+
+def test_response_cache_is_scoped_by_inputs_and_temperature(tmp_path):
+    pytest.importorskip("diskcache")
+    cache = ResponseCache(tmp_path)
+    cache.set("icici", "parse this statement", 0.0, "code")
+    assert cache.get("icici", "parse this statement", 0.0) == "code"
+    assert cache.get("sbi", "parse this statement", 0.0) is None
+    assert cache.get("icici", "parse this statement", 0.2) is None
+    assert cache.get("icici", "parse another statement", 0.0) is None
+
+def test_response_cache_falls_back_to_similar_prompts(tmp_path):
+    pytest.importorskip("diskcache")
+    vectors = {
+        "parse this statement": [1.0, 0.0],
+        "parse this statement please": [0.99, 0.05],
+        "write a poem": [0.0, 1.0],
+    }
+    cache = ResponseCache(tmp_path, embed=vectors.__getitem__, threshold=0.97)
+    cache.set("icici", "parse this statement", 0.0, "code")
+    assert cache.get("icici", "parse this statement please", 0.0) == "code"
+    assert cache.get("icici", "write a poem", 0.0) is None
+    assert cache.get("sbi", "parse this statement please", 0.0) is None
+
+def test_response_cache_ignores_embedding_errors(tmp_path):
+    pytest.importorskip("diskcache")
+    def embed(text):
+        raise RuntimeError("embedding quota exceeded")
+    cache = ResponseCache(tmp_path, embed=embed)
+    cache.set("icici", "parse this statement", 0.0, "code")
+    assert cache.get("icici", "parse this statement", 0.0) == "code"
+    assert cache.get("icici", "parse another statement", 0.0) is None
+
+def _statement_state(tmp_path):
+    pdf_path = tmp_path / "statement.pdf.txt"
+    pdf_path.write_text("01-08-2024  Salary  100\n")
+    csv_path = tmp_path / "expected.csv"
+    csv_path.write_text("Balance\n100\n")
+    return AgentState(target_bank="icici", pdf_path=str(pdf_path), csv_path=str(csv_path))
+
+def test_input_digest_changes_with_bank_and_inputs(tmp_path):
+    state = _statement_state(tmp_path)
+    digest = input_digest(state)
+    assert input_digest(state) == digest
+    
+    state.target_bank = "sbi"
+    assert input_digest(state) != digest
+    
+    state.target_bank = "icici"
+    with open(state.csv_path, "w") as f:
+        f.write("Balance\n200\n")
+    assert input_digest(state) != digest
+
+def test_agent_reuses_cached_parser(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(agent, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(ParserGenerator, "_setup_llm", lambda self: None)
+    state = _statement_state(tmp_path)
+    
+    cache_path = parser_cache_path(input_digest(state))
+    cache_path.parent.mkdir(parents=True)
+    cache_path.write_text(
+        "import pandas as pd\n"
+        "def parse(pdf_path):\n"
+        "    return pd.DataFrame({'Balance': [100]})\n"
+    )
+    
+    final_state = ParserGenerator().run_agent_loop(state)
+    assert final_state.success
+    assert final_state.parser_code == cache_path.read_text()
+
+def _layout_schema(expected):
+    return {"columns": list(expected.columns), "dtypes": expected.dtypes.to_dict()}
+
+def test_table_layout_parser_places_words_under_labels(tmp_path):
+    expected = pd.DataFrame({
+        "Date": ["01-08-2024", "02-08-2024"],
+        "Description": ["Salary Credit XYZ Pvt Ltd", "ATM Cash 1234"],
+        "Debit": [np.nan, 500.0],
+        "Credit": [1652.61, np.nan],
+        "Balance": [8517.19, 8017.19],
+    })
+    code = _table_layout_parser(_layout_schema(expected), LAYOUT_TEXT)
+    assert code is not None
+    
+    statement = tmp_path / "statement.pdf.txt"
+    statement.write_text(LAYOUT_TEXT)
+    result = _run_parser_test(code, str(statement), expected)
+    assert result["success"], result
+
+def test_table_layout_parser_needs_header():
+    schema = {"columns": ["Date", "Description", "Debit", "Credit", "Balance"], "dtypes": {}}
+    text = "\n".join(LAYOUT_TEXT.splitlines()[1:])
+    assert _table_layout_parser(schema, text) is None
+
+def test_table_layout_parser_matches_icici_sample():
+    pytest.importorskip("pdfplumber")
+    pdf_path = str(ICICI_DIR / "icici sample.pdf")
+    expected = load_csv(str(ICICI_DIR / "result.csv"))
+    code = _table_layout_parser(_layout_schema(expected), _read_layout_text(pdf_path))
+    assert code is not None
+    
+    result = _run_parser_test(code, pdf_path, expected)
+    assert result["success"], result